@@ -0,0 +1,124 @@
+import asyncio
+from typing import Dict, Any, List, Optional, Set, Tuple
+import logging
+from .gemini_api_client import MAX_TEXT_BATCH, GeminiUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Largest number of descriptions sent in one Gemini request
+MAX_BATCH = MAX_TEXT_BATCH
+# How long to wait for more descriptions once a burst has been detected
+MAX_WAIT = 0.02
+
+class TextBatcher:
+    """
+    Coalesces concurrent text-only analyses into a single Gemini request.
+
+    A description that arrives while nothing else is queued is analyzed on its
+    own right away. When several are waiting, up to `max_batch` of them
+    arriving within `max_wait` seconds are sent together and the batched reply
+    is split back to each caller.
+    """
+    def __init__(self, client, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT):
+        self.client = client
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    def start(self):
+        """
+        Start the background collector; must be called from the running event loop
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop collecting and fail every caller still waiting for a result
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        # Descriptions that were queued but never dispatched
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            self._fail(future)
+
+        # Requests already in flight fail their own callers when cancelled
+        for task in self._dispatches:
+            task.cancel()
+        await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    async def submit(self, description: str) -> Dict[str, Any]:
+        """
+        Queue a description and wait for its parsed result
+        """
+        if self._task is None:
+            return await self.client.analyze_text_only(description)
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((description, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # Only wait for company when a burst is already queued
+            if not self._queue.empty():
+                deadline = loop.time() + self.max_wait
+                try:
+                    while len(batch) < self.max_batch:
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                        except asyncio.TimeoutError:
+                            break
+                except asyncio.CancelledError:
+                    # Stopped while collecting, the partial batch would otherwise be lost
+                    for _, future in batch:
+                        self._fail(future)
+                    raise
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            if len(batch) == 1:
+                results = [await self.client.analyze_text_only(batch[0][0])]
+            else:
+                logger.debug("Analyzing %d text complaints in one request", len(batch))
+                results = await self.client.analyze_text_batch([description for description, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                self._fail(future)
+            raise
+        except Exception as e:
+            results = [e] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have gone away while the request was in flight
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(future: asyncio.Future):
+        if not future.done():
+            future.set_exception(GeminiUnavailableError("Text analysis is shutting down"))
@@ -0,0 +1,50 @@
+import time
+from typing import Optional
+
+class CircuitBreaker:
+    """
+    Minimal closed/open/half-open circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests are rejected for `recovery_timeout` seconds. Once that elapses the
+    circuit is half-open: a single probe request is let through while the rest
+    are still rejected, a success closes the circuit again and a failure
+    re-opens it. A probe that never reports back is replaced after another
+    `recovery_timeout`.
+    """
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return "half-open"
+        return "open"
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state != "half-open":
+            return state == "closed"
+
+        now = time.monotonic()
+        if self._probe_started_at is not None and now - self._probe_started_at < self.recovery_timeout:
+            return False
+        self._probe_started_at = now
+        return True
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probe_started_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        self._probe_started_at = None
+        if self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
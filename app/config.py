@@ -14,6 +14,21 @@ class Settings:
     # CORS settings
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
     
+    # Response cache settings
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))
+    CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 3600))
+    SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))
+    
+    # Request size limits
+    MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", 8 * 1024 * 1024))
+    # Room for a max-size image as base64 plus 64 KiB for the description and JSON, so the
+    # body limit never fires before the more specific "Image too large" check
+    MAX_BODY_SIZE = int(os.getenv("MAX_BODY_SIZE", MAX_IMAGE_BYTES * 4 // 3 + 64 * 1024))
+    
+    # Image preprocessing: 0 runs PIL work in threads, N > 0 uses a pool of N processes
+    IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", 0))
+    
     if not GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY environment variable is required")
 
@@ -1,15 +1,183 @@
-import requests
-import base64
+import httpx
+import asyncio
+import pybase64 as base64
 import json
+import orjson
+import re
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
+from tenacity import AsyncRetrying, retry_if_exception_type, retry_if_result, stop_after_attempt, wait_exponential_jitter
+from .circuit_breaker import CircuitBreaker
 from .config import settings
 from .models import Tag, Department, Priority
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Image formats Gemini accepts as inline data without re-encoding
+PASSTHROUGH_MIME_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+# Raised by _prepare_image for bytes PIL cannot use; the caller's input is at fault, not Gemini
+INVALID_IMAGE_ERRORS = (UnidentifiedImageError, Image.DecompressionBombError)
+
+# Longest image side sent to Gemini; the model downsamples larger inputs anyway
+MAX_IMAGE_SIDE = 1024
+
+# Longest stretch of a Gemini body kept in logs and error messages
+MAX_LOGGED_BODY = 512
+
+# Gemini status codes worth retrying; they also count as failures for the circuit breaker
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Matches every "FIELD: value" line of the structured Gemini reply in one pass
+_RESPONSE_RE = re.compile(
+    r'^[ \t]*(TAGS|DEPARTMENT|PRIORITY|IMAGE_DESCRIPTION|DESCRIPTION_MATCH|CONFIDENCE|SUGGESTED_ACTIONS):(.*)$',
+    re.MULTILINE
+)
+
+# Separates the per-request answers of a batched text analysis
+_BATCH_RESPONSE_RE = re.compile(r'^[ \t]*=== RESPONSE (\d+) ===[ \t]*$', re.MULTILINE)
+# Runs of '=' in user text, shortened so a description can never form a batch marker
+_MARKER_FENCE_RE = re.compile(r'={3,}')
+
+# Output budget of a single analysis, and the most Gemini 2.0 Flash will produce per request
+MAX_OUTPUT_TOKENS = 2048
+MODEL_MAX_OUTPUT_TOKENS = 8192
+# Largest text batch that still gives every reply a full single-analysis budget
+MAX_TEXT_BATCH = MODEL_MAX_OUTPUT_TOKENS // MAX_OUTPUT_TOKENS
+
+# Static parts of the analysis prompt; only the user description is interpolated per call
+_PROMPT_HEAD = """
+        Analyze this urban infrastructure image and description, and provide a detailed analysis in the following structured format:
+
+        USER_DESCRIPTION: """
+
+_PROMPT_MID = """
+
+        Available tags by department:
+
+        WATER DEPARTMENT:
+        - Pipe Burst, Low Pressure, Quality Issue, Meter Problem, Billing Issue
+
+        ROADS DEPARTMENT:
+        - Pothole, Traffic Signal, Street Light, Road Damage, Drainage
+
+        WASTE MANAGEMENT:
+        - Collection Delay, Bin Overflow, Illegal Dumping, Recycling, Hazardous Waste
+
+        ELECTRICITY DEPARTMENT:
+        - Power Outage, Voltage Issues, Meter Reading, Billing, Street Light
+
+        Please analyze and respond with EXACTLY this format (no additional text):
+
+        TAGS: [comma-separated list of relevant tags from the above categories]
+        DEPARTMENT: [water, roads, waste, electricity, other]
+        PRIORITY: [low, medium, high, critical]
+        IMAGE_DESCRIPTION: [Detailed professional description of the image content]
+        DESCRIPTION_MATCH: [true/false - does the image match the user's description?]
+        CONFIDENCE: [0.0-1.0 confidence score]
+        SUGGESTED_ACTIONS: [comma-separated list of 2-3 suggested actions]
+
+        Important: The user described: \""""
+
+_PROMPT_TAIL = """\". Compare the image content with this description.
+        Consider the severity and urgency when assigning priority.
+
+        Respond ONLY with the structured format above, no additional commentary.
+        """
+
+# Lookup tables for parsed response values, built once at import time
+_TAG_MAP = {
+    # Water Department
+    'pipe burst': Tag.PIPE_BURST,
+    'low pressure': Tag.LOW_PRESSURE,
+    'quality issue': Tag.QUALITY_ISSUE,
+    'meter problem': Tag.METER_PROBLEM,
+    'billing issue': Tag.BILLING_ISSUE,
+    
+    # Roads Department
+    'pothole': Tag.POTHOLE,
+    'traffic signal': Tag.TRAFFIC_SIGNAL,
+    'street light': Tag.STREET_LIGHT,
+    'road damage': Tag.ROAD_DAMAGE,
+    'drainage': Tag.DRAINAGE,
+    
+    # Waste Management
+    'collection delay': Tag.COLLECTION_DELAY,
+    'bin overflow': Tag.BIN_OVERFLOW,
+    'illegal dumping': Tag.ILLEGAL_DUMPING,
+    'recycling': Tag.RECYCLING,
+    'hazardous waste': Tag.HAZARDOUS_WASTE,
+    
+    # Electricity Department
+    'power outage': Tag.POWER_OUTAGE,
+    'voltage issues': Tag.VOLTAGE_ISSUES,
+    'meter reading': Tag.METER_READING,
+    'billing': Tag.BILLING,
+    'street light electricity': Tag.STREET_LIGHT_ELECTRICITY,
+}
+
+_TAG_KEYS = frozenset(_TAG_MAP)
+_TAG_SPLIT_RE = re.compile(r'\s*,\s*')
+
+_DEPT_MAP = {
+    'water': Department.WATER,
+    'roads': Department.ROADS,
+    'waste': Department.WASTE,
+    'electricity': Department.ELECTRICITY,
+    'other': Department.OTHER
+}
+
+_PRIORITY_MAP = {
+    'low': Priority.LOW,
+    'medium': Priority.MEDIUM,
+    'high': Priority.HIGH,
+    'critical': Priority.CRITICAL
+}
+
+def _sniff_mime_type(image_bytes: bytes) -> Optional[str]:
+    """
+    Detect the image format from its magic bytes
+    """
+    # The first 12 bytes are enough for every signature below
+    header = image_bytes[:12]
+    
+    if header.startswith(b'\xff\xd8\xff'):
+        return "image/jpeg"
+    if header.startswith(b'\x89PNG'):
+        return "image/png"
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return "image/webp"
+    return None
+
+def _prepare_image(image_bytes: bytes, mime_type: Optional[str]) -> Tuple[str, Optional[bytes]]:
+    """
+    Downscale/re-encode an uploaded image for Gemini if needed.
+    Returns the (mime_type, re-encoded bytes) to send, with None as the bytes when
+    the original can be sent unchanged. Runs in a worker thread or process.
+    """
+    # Image.open only reads the header, so checking the size is cheap
+    image = Image.open(BytesIO(image_bytes))
+    
+    if mime_type in PASSTHROUGH_MIME_TYPES and max(image.size) <= MAX_IMAGE_SIDE:
+        # Already within the size limit, reuse the original bytes without recompression
+        return mime_type, None
+    
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    image.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.Resampling.LANCZOS)
+    
+    buffered = BytesIO()
+    image.save(buffered, format="JPEG", quality=85, optimize=True)
+    return "image/jpeg", buffered.getvalue()
+
+class GeminiUnavailableError(Exception):
+    """
+    Raised without calling Gemini while the circuit breaker is open
+    """
+
 class GeminiAPIClient:
     def __init__(self):
         self.api_key = settings.GEMINI_API_KEY
@@ -17,20 +185,59 @@ class GeminiAPIClient:
         self.headers = {
             "Content-Type": "application/json",
         }
+        # Pooled HTTP/2 client so keep-alive connections and TLS sessions are reused across requests
+        self._client = httpx.AsyncClient(
+            http2=True,
+            headers=self.headers,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+        self._breaker = CircuitBreaker(failure_threshold=5, recovery_timeout=30.0)
+        # Process pool for image preprocessing on CPU-bound deployments; threads are used otherwise
+        self._image_executor = None
+        if settings.IMAGE_PROCESS_WORKERS > 0:
+            self._image_executor = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS)
+        # Response field -> (result key, value parser)
+        self._field_parsers = {
+            'TAGS': ('tags', self._parse_tags),
+            'DEPARTMENT': ('department', self._parse_department),
+            'PRIORITY': ('priority', self._parse_priority),
+            'IMAGE_DESCRIPTION': ('image_description', str.strip),
+            'DESCRIPTION_MATCH': ('description_match', self._parse_bool),
+            'CONFIDENCE': ('confidence_score', self._parse_confidence),
+            'SUGGESTED_ACTIONS': ('suggested_actions', self._parse_actions),
+        }
+    
+    async def aclose(self):
+        """
+        Close the pooled HTTP client and image worker processes
+        """
+        await self._client.aclose()
+        if self._image_executor is not None:
+            self._image_executor.shutdown(wait=False)
         
-    def analyze_image(self, image_data: str, user_description: str) -> Dict[str, Any]:
+    async def analyze_image(self, image_bytes: bytes, user_description: str, image_base64: Optional[str] = None) -> Dict[str, Any]:
         """
-        Analyze image using Gemini 2.0 Flash API
+        Analyze image using Gemini 2.0 Flash API.
+        `image_base64` is the client's own encoding of `image_bytes`, when it sent one.
         """
         try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data)
-            image = Image.open(BytesIO(image_bytes))
+            # Only the actual bytes are trusted; anything not sniffed as a passthrough format is re-encoded
+            mime_type = _sniff_mime_type(image_bytes)
+            
+            # Even small files may have large dimensions (e.g. flat PNG screenshots), so always check them
+            if self._image_executor is not None:
+                loop = asyncio.get_running_loop()
+                mime_type, prepared = await loop.run_in_executor(self._image_executor, _prepare_image, image_bytes, mime_type)
+            else:
+                # Resize/encode is CPU-bound, keep it off the event loop
+                mime_type, prepared = await asyncio.to_thread(_prepare_image, image_bytes, mime_type)
             
-            # Convert image to base64 for API
-            buffered = BytesIO()
-            image.save(buffered, format="JPEG")
-            image_base64 = base64.b64encode(buffered.getvalue()).decode('utf-8')
+            # Only encode when the image was re-encoded or arrived as raw bytes
+            if prepared is not None:
+                image_base64 = base64.b64encode_as_string(prepared)
+            elif image_base64 is None:
+                image_base64 = base64.b64encode_as_string(image_bytes)
             
             # Prepare the prompt
             prompt = self._create_prompt(user_description)
@@ -43,7 +250,7 @@ class GeminiAPIClient:
                             {"text": prompt},
                             {
                                 "inline_data": {
-                                    "mime_type": "image/jpeg",
+                                    "mime_type": mime_type,
                                     "data": image_base64
                                 }
                             }
@@ -54,35 +261,20 @@ class GeminiAPIClient:
                     "temperature": 0.1,
                     "topP": 0.8,
                     "topK": 40,
-                    "maxOutputTokens": 2048,
+                    "maxOutputTokens": MAX_OUTPUT_TOKENS,
                 }
             }
             
             # Make API request
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers=self.headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and result['candidates']:
-                    text_response = result['candidates'][0]['content']['parts'][0]['text']
-                    return self._parse_response(text_response, user_description)
-                else:
-                    raise Exception("No response from Gemini API")
-            else:
-                error_msg = f"API Error: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            return await self._generate(payload, user_description)
                 
+        except (GeminiUnavailableError, *INVALID_IMAGE_ERRORS):
+            raise
         except Exception as e:
-            logger.error(f"Error in analyze_image: {str(e)}")
+            logger.error("Error in analyze_image: %s", e)
             raise Exception(f"Error analyzing image: {str(e)}")
     
-    def analyze_text_only(self, user_description: str) -> Dict[str, Any]:
+    async def analyze_text_only(self, user_description: str) -> Dict[str, Any]:
         """
         Fallback method for text-only analysis
         """
@@ -101,98 +293,160 @@ class GeminiAPIClient:
                     "temperature": 0.1,
                     "topP": 0.8,
                     "topK": 40,
-                    "maxOutputTokens": 2048,
+                    "maxOutputTokens": MAX_OUTPUT_TOKENS,
                 }
             }
             
-            response = requests.post(
-                f"{self.base_url}?key={self.api_key}",
-                headers=self.headers,
-                json=payload,
-                timeout=30
+            return await self._generate(payload, user_description)
+                
+        except GeminiUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Error in analyze_text_only: %s", e)
+            raise Exception(f"Error analyzing text: {str(e)}")
+    
+    async def analyze_text_batch(self, user_descriptions: List[str]) -> List[Any]:
+        """
+        Analyze several text-only complaints with a single Gemini request.
+        Returns one parsed result per description. Entries missing from the
+        reply or failing to parse are re-analyzed on their own; if that fails
+        too, their exception is returned in place of the result.
+        """
+        if len(user_descriptions) > MAX_TEXT_BATCH:
+            # Beyond this the replies would have to share one output budget and get truncated
+            chunks = [user_descriptions[i:i + MAX_TEXT_BATCH] for i in range(0, len(user_descriptions), MAX_TEXT_BATCH)]
+            chunk_results = await asyncio.gather(*(self.analyze_text_batch(chunk) for chunk in chunks))
+            return [result for results in chunk_results for result in results]
+        
+        try:
+            # Neutralize marker-like text so one user's description can't shift another's answer
+            requests_text = "\n".join(
+                f"=== REQUEST {index} ===\n{self._create_prompt(_MARKER_FENCE_RE.sub('==', description))}"
+                for index, description in enumerate(user_descriptions, 1)
+            )
+            prompt = (
+                f"You will receive {len(user_descriptions)} independent complaints, each starting with a "
+                "'=== REQUEST i ===' marker. Answer every one of them separately. Start each answer with a "
+                "'=== RESPONSE i ===' line using the same number, followed by the structured format requested.\n\n"
+                f"{requests_text}"
             )
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and result['candidates']:
-                    text_response = result['candidates'][0]['content']['parts'][0]['text']
-                    return self._parse_response(text_response, user_description)
-                else:
-                    raise Exception("No response from Gemini API")
-            else:
-                error_msg = f"API Error: {response.status_code} - {response.text}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
+            payload = {
+                "contents": [
+                    {
+                        "parts": [
+                            {"text": prompt}
+                        ]
+                    }
+                ],
+                "generationConfig": {
+                    "temperature": 0.1,
+                    "topP": 0.8,
+                    "topK": 40,
+                    "maxOutputTokens": MAX_OUTPUT_TOKENS * len(user_descriptions),
+                }
+            }
+            
+            text_response = await self._generate_text(payload)
                 
+        except GeminiUnavailableError:
+            raise
         except Exception as e:
-            logger.error(f"Error in analyze_text_only: {str(e)}")
+            logger.error("Error in analyze_text_batch: %s", e)
             raise Exception(f"Error analyzing text: {str(e)}")
+        
+        # Split the reply on its response markers and parse each block separately
+        blocks = {}
+        matches = list(_BATCH_RESPONSE_RE.finditer(text_response))
+        for match, next_match in zip(matches, matches[1:] + [None]):
+            end = next_match.start() if next_match else len(text_response)
+            blocks[int(match.group(1))] = text_response[match.end():end]
+        
+        results: List[Any] = []
+        fallbacks: Dict[int, str] = {}
+        for index, description in enumerate(user_descriptions, 1):
+            try:
+                if index not in blocks:
+                    raise ValueError(f"Missing response {index} in batched reply")
+                results.append(self._parse_response(blocks[index], description))
+            except ValueError as e:
+                # The model may drop or renumber the markers, fall back to a single request
+                logger.warning("Batched reply unusable for request %d, analyzing it alone: %s", index, e)
+                results.append(None)
+                fallbacks[index - 1] = description
+        
+        if fallbacks:
+            retried = await asyncio.gather(
+                *(self.analyze_text_only(description) for description in fallbacks.values()),
+                return_exceptions=True
+            )
+            for position, result in zip(fallbacks, retried):
+                results[position] = result
+        return results
     
-    def _create_prompt(self, user_description: str) -> str:
-        return f"""
-        Analyze this urban infrastructure image and description, and provide a detailed analysis in the following structured format:
-
-        USER_DESCRIPTION: {user_description}
-
-        Available tags by department:
-
-        WATER DEPARTMENT:
-        - Pipe Burst, Low Pressure, Quality Issue, Meter Problem, Billing Issue
-
-        ROADS DEPARTMENT:
-        - Pothole, Traffic Signal, Street Light, Road Damage, Drainage
-
-        WASTE MANAGEMENT:
-        - Collection Delay, Bin Overflow, Illegal Dumping, Recycling, Hazardous Waste
-
-        ELECTRICITY DEPARTMENT:
-        - Power Outage, Voltage Issues, Meter Reading, Billing, Street Light
-
-        Please analyze and respond with EXACTLY this format (no additional text):
-
-        TAGS: [comma-separated list of relevant tags from the above categories]
-        DEPARTMENT: [water, roads, waste, electricity, other]
-        PRIORITY: [low, medium, high, critical]
-        IMAGE_DESCRIPTION: [Detailed professional description of the image content]
-        DESCRIPTION_MATCH: [true/false - does the image match the user's description?]
-        CONFIDENCE: [0.0-1.0 confidence score]
-        SUGGESTED_ACTIONS: [comma-separated list of 2-3 suggested actions]
-
-        Important: The user described: "{user_description}". Compare the image content with this description.
-        Consider the severity and urgency when assigning priority.
-
-        Respond ONLY with the structured format above, no additional commentary.
+    async def _generate(self, payload: Dict[str, Any], user_description: str) -> Dict[str, Any]:
+        """
+        Send a generateContent request and parse the structured reply
+        """
+        text_response = await self._generate_text(payload)
+        return self._parse_response(text_response, user_description)
+    
+    async def _generate_text(self, payload: Dict[str, Any]) -> str:
+        """
+        Send a generateContent request and return the text of the first candidate
         """
+        if not self._breaker.allow_request():
+            raise GeminiUnavailableError("Gemini API is temporarily unavailable")
+        
+        # Retry transient errors with jittered backoff; the last response is returned once attempts run out
+        retrying = AsyncRetrying(
+            retry=retry_if_exception_type((httpx.ConnectError, httpx.RemoteProtocolError)) | retry_if_result(lambda r: r.status_code in RETRYABLE_STATUS_CODES),
+            wait=wait_exponential_jitter(initial=0.2, max=4),
+            stop=stop_after_attempt(4),
+            retry_error_callback=lambda retry_state: retry_state.outcome.result()
+        )
+        
+        # Serialize once with orjson; the client already sends the JSON content type
+        body = orjson.dumps(payload)
+        
+        try:
+            response = await retrying(
+                self._client.post,
+                self.base_url,
+                params={"key": self.api_key},
+                content=body
+            )
+        except httpx.TransportError:
+            self._breaker.record_failure()
+            raise
+        
+        if response.status_code in RETRYABLE_STATUS_CODES:
+            self._breaker.record_failure()
+        else:
+            self._breaker.record_success()
+        
+        if response.status_code == 200:
+            result = response.json()
+            if 'candidates' in result and result['candidates']:
+                return result['candidates'][0]['content']['parts'][0]['text']
+            else:
+                raise Exception("No response from Gemini API")
+        else:
+            # Error bodies can be large; only keep the start for logs and the raised message
+            error_body = response.text[:MAX_LOGGED_BODY]
+            logger.error("API Error: %s - %s", response.status_code, error_body)
+            raise Exception(f"API Error: {response.status_code} - {error_body}")
+    
+    def _create_prompt(self, user_description: str) -> str:
+        return f"{_PROMPT_HEAD}{user_description}{_PROMPT_MID}{user_description}{_PROMPT_TAIL}"
 
     def _parse_response(self, response_text: str, user_description: str) -> Dict[str, Any]:
         try:
-            lines = response_text.strip().split('\n')
             result = {}
             
-            for line in lines:
-                line = line.strip()
-                if line.startswith('TAGS:'):
-                    tags_str = line.replace('TAGS:', '').strip().strip('[]')
-                    result['tags'] = [self._parse_tag(tag.strip()) for tag in tags_str.split(',') if tag.strip()]
-                elif line.startswith('DEPARTMENT:'):
-                    dept_str = line.replace('DEPARTMENT:', '').strip()
-                    result['department'] = self._parse_department(dept_str)
-                elif line.startswith('PRIORITY:'):
-                    priority_str = line.replace('PRIORITY:', '').strip()
-                    result['priority'] = self._parse_priority(priority_str)
-                elif line.startswith('IMAGE_DESCRIPTION:'):
-                    result['image_description'] = line.replace('IMAGE_DESCRIPTION:', '').strip()
-                elif line.startswith('DESCRIPTION_MATCH:'):
-                    match_str = line.replace('DESCRIPTION_MATCH:', '').strip().lower()
-                    result['description_match'] = match_str == 'true'
-                elif line.startswith('CONFIDENCE:'):
-                    try:
-                        result['confidence_score'] = float(line.replace('CONFIDENCE:', '').strip())
-                    except:
-                        result['confidence_score'] = 0.5
-                elif line.startswith('SUGGESTED_ACTIONS:'):
-                    actions_str = line.replace('SUGGESTED_ACTIONS:', '').strip().strip('[]')
-                    result['suggested_actions'] = [action.strip() for action in actions_str.split(',') if action.strip()]
+            for field, value in _RESPONSE_RE.findall(response_text):
+                key, parser = self._field_parsers[field]
+                result[key] = parser(value)
             
             # Validate required fields
             required_fields = ['tags', 'department', 'priority', 'image_description', 'description_match']
@@ -209,57 +463,33 @@ class GeminiAPIClient:
             return result
             
         except Exception as e:
-            raise ValueError(f"Failed to parse Gemini response: {str(e)}\nResponse: {response_text}")
-
-    def _parse_tag(self, tag_str: str) -> Tag:
-        tag_mapping = {
-            # Water Department
-            'pipe burst': Tag.PIPE_BURST,
-            'low pressure': Tag.LOW_PRESSURE,
-            'quality issue': Tag.QUALITY_ISSUE,
-            'meter problem': Tag.METER_PROBLEM,
-            'billing issue': Tag.BILLING_ISSUE,
-            
-            # Roads Department
-            'pothole': Tag.POTHOLE,
-            'traffic signal': Tag.TRAFFIC_SIGNAL,
-            'street light': Tag.STREET_LIGHT,
-            'road damage': Tag.ROAD_DAMAGE,
-            'drainage': Tag.DRAINAGE,
-            
-            # Waste Management
-            'collection delay': Tag.COLLECTION_DELAY,
-            'bin overflow': Tag.BIN_OVERFLOW,
-            'illegal dumping': Tag.ILLEGAL_DUMPING,
-            'recycling': Tag.RECYCLING,
-            'hazardous waste': Tag.HAZARDOUS_WASTE,
-            
-            # Electricity Department
-            'power outage': Tag.POWER_OUTAGE,
-            'voltage issues': Tag.VOLTAGE_ISSUES,
-            'meter reading': Tag.METER_READING,
-            'billing': Tag.BILLING,
-            'street light electricity': Tag.STREET_LIGHT_ELECTRICITY,
-        }
-        
-        cleaned_tag = tag_str.lower().strip()
-        return tag_mapping.get(cleaned_tag, Tag.OTHER)
+            # The raw model output may be long and ends up in HTTP error details, so only log its start
+            logger.error("Failed to parse Gemini response: %s\nResponse: %s", e, response_text[:MAX_LOGGED_BODY])
+            raise ValueError(f"Failed to parse Gemini response: {str(e)}")
+
+    def _parse_tags(self, tags_str: str) -> List[Tag]:
+        keys = [key for key in _TAG_SPLIT_RE.split(tags_str.strip().strip('[]').lower()) if key]
+        # Known tags in reply order without duplicates; unknown ones are dropped
+        tags = [_TAG_MAP[key] for key in dict.fromkeys(keys) if key in _TAG_KEYS]
+        if keys and not tags:
+            return [Tag.OTHER]
+        return tags
+
+    def _parse_actions(self, actions_str: str) -> List[str]:
+        actions_str = actions_str.strip().strip('[]')
+        return [action.strip() for action in actions_str.split(',') if action.strip()]
+
+    def _parse_bool(self, bool_str: str) -> bool:
+        return bool_str.strip().lower() == 'true'
+
+    def _parse_confidence(self, confidence_str: str) -> float:
+        try:
+            return float(confidence_str.strip())
+        except ValueError:
+            return 0.5
 
     def _parse_department(self, dept_str: str) -> Department:
-        dept_mapping = {
-            'water': Department.WATER,
-            'roads': Department.ROADS,
-            'waste': Department.WASTE,
-            'electricity': Department.ELECTRICITY,
-            'other': Department.OTHER
-        }
-        return dept_mapping.get(dept_str.lower(), Department.OTHER)
+        return _DEPT_MAP.get(dept_str.strip().lower(), Department.OTHER)
 
     def _parse_priority(self, priority_str: str) -> Priority:
-        priority_mapping = {
-            'low': Priority.LOW,
-            'medium': Priority.MEDIUM,
-            'high': Priority.HIGH,
-            'critical': Priority.CRITICAL
-        }
-        return priority_mapping.get(priority_str.lower(), Priority.MEDIUM)
\ No newline at end of file
+        return _PRIORITY_MAP.get(priority_str.strip().lower(), Priority.MEDIUM)
\ No newline at end of file
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import xxhash
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LLMCache:
+    """
+    In-memory LRU cache of parsed Gemini results keyed on (description, image).
+
+    Entries expire after `ttl` seconds and the oldest entry is evicted once
+    `max_entries` is reached. When `semantic_threshold` is set, a second tier
+    matches near-identical descriptions for the same image by embedding
+    similarity (requires the optional sentence-transformers and numpy packages).
+    Embedding is CPU-bound, so the semantic tier runs in a worker thread.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, semantic_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._semantic = None
+
+        if semantic_threshold is not None:
+            try:
+                self._semantic = _SemanticIndex(semantic_threshold)
+            except ImportError as e:
+                logger.warning("Semantic cache disabled: %s", e)
+
+    @staticmethod
+    def make_key(description: str, image_digest: Optional[str] = None) -> str:
+        key_data = json.dumps({"desc": description, "img": image_digest}, sort_keys=True)
+        return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def image_digest(image_data: Optional[bytes]) -> Optional[str]:
+        # Only text-only requests have no digest; empty image bytes must not share their key
+        if image_data is None:
+            return None
+        return xxhash.xxh3_128_hexdigest(image_data)
+
+    async def get(self, description: str, image_data: Optional[bytes] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached result for this input, or None on a miss
+        """
+        image_digest = self.image_digest(image_data)
+        key = self.make_key(description, image_digest)
+        result = self._lookup(key)
+
+        if result is None and self._semantic is not None:
+            similar_key = await asyncio.to_thread(self._semantic.find, description, image_digest)
+            if similar_key is not None:
+                result = self._lookup(similar_key)
+
+        return result
+
+    async def set(self, description: str, image_data: Optional[bytes], result: Dict[str, Any]):
+        """
+        Store a parsed result for this input
+        """
+        image_digest = self.image_digest(image_data)
+        key = self.make_key(description, image_digest)
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        if self._semantic is not None:
+            await asyncio.to_thread(self._semantic.add, key, description, image_digest)
+
+    def clear(self):
+        self._entries.clear()
+        if self._semantic is not None:
+            self._semantic.clear()
+
+    def _lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return result
+
+class _SemanticIndex:
+    """
+    Small ring of recent description embeddings searched by cosine similarity.
+    Safe to call from several worker threads at once.
+    """
+    def __init__(self, threshold: float, max_items: int = 256, model_name: str = "all-MiniLM-L6-v2"):
+        import numpy as np
+        from sentence_transformers import SentenceTransformer
+
+        self._np = np
+        self._model = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.max_items = max_items
+        self._keys: List[str] = []
+        self._image_digests: List[Optional[str]] = []
+        self._matrix = None
+        # Guards the matrix and the parallel key/digest lists, not the embedding itself
+        self._lock = threading.Lock()
+
+    def _embed(self, description: str):
+        return self._model.encode(description, normalize_embeddings=True).astype(self._np.float32)
+
+    def find(self, description: str, image_digest: Optional[str]) -> Optional[str]:
+        if self._matrix is None:
+            return None
+
+        embedding = self._embed(description)
+        with self._lock:
+            # Embeddings are normalized, so the dot product is the cosine similarity
+            scores = self._matrix @ embedding
+            for index in self._np.argsort(scores)[::-1]:
+                if scores[index] < self.threshold:
+                    break
+                if self._image_digests[index] == image_digest:
+                    return self._keys[index]
+        return None
+
+    def add(self, key: str, description: str, image_digest: Optional[str]):
+        embedding = self._embed(description)[None, :]
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = embedding
+            else:
+                self._matrix = self._np.vstack([self._matrix, embedding])[-self.max_items:]
+
+            self._keys = (self._keys + [key])[-self.max_items:]
+            self._image_digests = (self._image_digests + [image_digest])[-self.max_items:]
+
+    def clear(self):
+        with self._lock:
+            self._keys = []
+            self._image_digests = []
+            self._matrix = None
@@ -1,11 +1,20 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, File, Form, HTTPException, Request, Response, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from .models import ComplaintRequest, ComplaintResponse, Tag, Department, Priority, DepartmentInfo
-from .gemini_api_client import GeminiAPIClient
+from .gemini_api_client import GeminiAPIClient, GeminiUnavailableError, INVALID_IMAGE_ERRORS
+from .llm_cache import LLMCache
+from .batcher import TextBatcher
+from .middleware import LimitUploadSizeMiddleware
 from .config import settings
-import base64
+from typing import Any, Optional, Tuple
+import binascii
+import hashlib
 import logging
+import orjson
+import pybase64 as base64
+import re
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -16,10 +25,12 @@ app = FastAPI(
     description="AI-powered system for analyzing urban infrastructure complaints and routing them to appropriate departments",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse
 )
 
 # Add middleware
+app.add_middleware(LimitUploadSizeMiddleware, max_body_size=settings.MAX_BODY_SIZE)
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 app.add_middleware(
     CORSMiddleware,
@@ -34,9 +45,19 @@ try:
     gemini_client = GeminiAPIClient()
     logger.info("Gemini API client initialized successfully")
 except Exception as e:
-    logger.error(f"Failed to initialize Gemini API client: {e}")
+    logger.error("Failed to initialize Gemini API client: %s", e)
     gemini_client = None
 
+# Coalesces concurrent text-only analyses into shared Gemini requests
+text_batcher = TextBatcher(gemini_client) if gemini_client else None
+
+# Cache of parsed Gemini results for repeated complaints
+llm_cache = LLMCache(
+    max_entries=settings.CACHE_MAX_ENTRIES,
+    ttl=settings.CACHE_TTL_SECONDS,
+    semantic_threshold=settings.SEMANTIC_CACHE_THRESHOLD if settings.SEMANTIC_CACHE else None
+)
+
 # Department information database
 DEPARTMENT_INFO = {
     Department.WATER: DepartmentInfo(
@@ -76,13 +97,114 @@ DEPARTMENT_INFO = {
     )
 }
 
+# Header of a base64 image data URL, e.g. "data:image/jpeg;base64,"
+_DATA_URL_RE = re.compile(r'data:(image/[a-z0-9.+-]+);base64,')
+
+# Tags handled by each department
+DEPARTMENT_TAGS = {
+    Department.WATER: [Tag.PIPE_BURST, Tag.LOW_PRESSURE, Tag.QUALITY_ISSUE, Tag.METER_PROBLEM, Tag.BILLING_ISSUE],
+    Department.ROADS: [Tag.POTHOLE, Tag.TRAFFIC_SIGNAL, Tag.STREET_LIGHT, Tag.ROAD_DAMAGE, Tag.DRAINAGE],
+    Department.WASTE: [Tag.COLLECTION_DELAY, Tag.BIN_OVERFLOW, Tag.ILLEGAL_DUMPING, Tag.RECYCLING, Tag.HAZARDOUS_WASTE],
+    Department.ELECTRICITY: [Tag.POWER_OUTAGE, Tag.VOLTAGE_ISSUES, Tag.METER_READING, Tag.BILLING, Tag.STREET_LIGHT_ELECTRICITY]
+}
+
+# Static GET responses, built once at import time
+_TAGS_RESPONSE = {
+    "water_department": [tag.value for tag in DEPARTMENT_TAGS[Department.WATER]],
+    "roads_department": [tag.value for tag in DEPARTMENT_TAGS[Department.ROADS]],
+    "waste_management": [tag.value for tag in DEPARTMENT_TAGS[Department.WASTE]],
+    "electricity_department": [tag.value for tag in DEPARTMENT_TAGS[Department.ELECTRICITY]]
+}
+_TAGS_PER_DEPT = {
+    dept: {"department": dept.value, "tags": [tag.value for tag in DEPARTMENT_TAGS.get(dept, [])]}
+    for dept in Department
+}
+_DEPARTMENTS_RESPONSE = {dept.value: info.model_dump() for dept, info in DEPARTMENT_INFO.items()}
+_PRIORITIES_RESPONSE = {"priorities": [priority.value for priority in Priority]}
+_HEALTH_RESPONSE = {
+    "status": "healthy",
+    "service": "Urban Infrastructure Analyzer",
+    "gemini_available": gemini_client is not None,
+    "api_version": "v2.0.0",
+    "supported_models": ["gemini-2.0-flash"]
+}
+_ROOT_RESPONSE = {
+    "message": "Urban Infrastructure Complaint Analyzer API",
+    "version": "2.0.0",
+    "docs": "/docs",
+    "endpoints": {
+        "analyze_complaint": "/analyze-complaint",
+        "analyze_complaint_upload": "/analyze-complaint/upload",
+        "analyze_text": "/analyze-text",
+        "health": "/health",
+        "tags": "/tags",
+        "departments": "/departments",
+        "priorities": "/priorities"
+    },
+    "status": "operational" if gemini_client else "initializing"
+}
+
+# Static responses only change between deploys, so clients and CDNs may cache them
+STATIC_CACHE_CONTROL = "public, max-age=3600"
+
+def _static_entity(payload: Any) -> Tuple[bytes, str]:
+    """Serialize a static payload once and derive its ETag"""
+    body = orjson.dumps(payload)
+    # Weak, since GZipMiddleware may serve the same entity gzip-encoded under this tag
+    return body, f'W/"{hashlib.md5(body).hexdigest()}"'
+
+def _opaque_tag(etag: str) -> str:
+    etag = etag.strip()
+    return etag[2:] if etag.startswith("W/") else etag
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match list against an ETag, as required for GET"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == opaque for candidate in if_none_match.split(","))
+
+def _static_response(request: Request, entity: Tuple[bytes, str], cache_control: str = STATIC_CACHE_CONTROL) -> Response:
+    """Return a pre-serialized entity, or 304 when the client already has it"""
+    body, etag = entity
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, headers=headers, media_type="application/json")
+
+_TAGS_ENTITY = _static_entity(_TAGS_RESPONSE)
+_TAGS_PER_DEPT_ENTITIES = {dept: _static_entity(payload) for dept, payload in _TAGS_PER_DEPT.items()}
+_DEPARTMENTS_ENTITY = _static_entity(_DEPARTMENTS_RESPONSE)
+_PRIORITIES_ENTITY = _static_entity(_PRIORITIES_RESPONSE)
+_HEALTH_ENTITY = _static_entity(_HEALTH_RESPONSE)
+_ROOT_ENTITY = _static_entity(_ROOT_RESPONSE)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Application starting up...")
+    if text_batcher:
+        text_batcher.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Application shutting down...")
+    if text_batcher:
+        await text_batcher.stop()
+    if gemini_client:
+        await gemini_client.aclose()
+
+async def _analyze_image_complaint(image_bytes: bytes, description: str, image_base64: Optional[str] = None) -> ComplaintResponse:
+    """Analyze with Gemini API unless an identical complaint is cached"""
+    if not image_bytes:
+        raise HTTPException(status_code=400, detail="Image data is empty")
+    
+    result = await llm_cache.get(description, image_bytes)
+    if result is None:
+        result = await gemini_client.analyze_image(image_bytes, description, image_base64)
+        await llm_cache.set(description, image_bytes, result)
+    
+    return ComplaintResponse.model_validate(result)
 
 @app.post("/analyze-complaint", response_model=ComplaintResponse)
 async def analyze_complaint(request: ComplaintRequest):
@@ -94,30 +216,64 @@ async def analyze_complaint(request: ComplaintRequest):
         if not gemini_client:
             raise HTTPException(status_code=503, detail="Service temporarily unavailable")
         
-        # Validate image data
-        if not request.image_data.startswith('data:image/'):
+        # Validate the data URL header, only looking at its first bytes
+        match = _DATA_URL_RE.match(request.image_data, 0, 64)
+        if not match:
             raise HTTPException(status_code=400, detail="Invalid image format. Expected base64 encoded image.")
         
-        # Extract base64 data (remove data:image/... prefix)
-        image_data = request.image_data.split(',')[1] if ',' in request.image_data else request.image_data
+        # Bound memory before decoding: base64 carries 3 bytes per 4 characters
+        if len(request.image_data) - match.end() > settings.MAX_IMAGE_BYTES * 4 // 3:
+            raise HTTPException(status_code=413, detail="Image too large")
         
-        # Analyze with Gemini API
-        result = gemini_client.analyze_image(image_data, request.description)
+        # Decode the payload after the header for inspection; the declared type is not trusted.
+        # The original base64 text is kept so unchanged images are forwarded without re-encoding
+        image_base64 = request.image_data[match.end():]
+        try:
+            image_bytes = base64.b64decode(image_base64, validate=True)
+        except (binascii.Error, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid image format. Expected base64 encoded image.")
         
-        return ComplaintResponse(
-            tags=result['tags'],
-            department=result['department'],
-            priority=result['priority'],
-            image_description=result['image_description'],
-            description_match=result['description_match'],
-            confidence_score=result.get('confidence_score', 0.5),
-            suggested_actions=result.get('suggested_actions', [])
-        )
+        return await _analyze_image_complaint(image_bytes, request.description, image_base64)
         
     except HTTPException:
         raise
+    except INVALID_IMAGE_ERRORS as e:
+        logger.info("Rejected unreadable image: %s", e)
+        raise HTTPException(status_code=400, detail="Invalid image data. Expected a readable image file.")
+    except GeminiUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        logger.error(f"Error analyzing complaint: {e}")
+        logger.error("Error analyzing complaint: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/analyze-complaint/upload", response_model=ComplaintResponse)
+async def analyze_complaint_upload(description: str = Form(""), image: UploadFile = File(...)):
+    """
+    Analyze a complaint sent as multipart form data with the raw image file.
+    Same result as /analyze-complaint without the base64 overhead on the wire.
+    """
+    try:
+        if not gemini_client:
+            raise HTTPException(status_code=503, detail="Service temporarily unavailable")
+        
+        if image.size is not None and image.size > settings.MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail="Image too large")
+        
+        image_bytes = await image.read()
+        if len(image_bytes) > settings.MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail="Image too large")
+        
+        return await _analyze_image_complaint(image_bytes, description)
+        
+    except HTTPException:
+        raise
+    except INVALID_IMAGE_ERRORS as e:
+        logger.info("Rejected unreadable image: %s", e)
+        raise HTTPException(status_code=400, detail="Invalid image data. Expected a readable image file.")
+    except GeminiUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error("Error analyzing complaint: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/analyze-text", response_model=ComplaintResponse)
@@ -129,61 +285,41 @@ async def analyze_text_only(description: str):
         if not gemini_client:
             raise HTTPException(status_code=503, detail="Service temporarily unavailable")
         
-        result = gemini_client.analyze_text_only(description)
+        result = await llm_cache.get(description)
+        if result is None:
+            result = await text_batcher.submit(description)
+            await llm_cache.set(description, None, result)
         
-        return ComplaintResponse(
-            tags=result['tags'],
-            department=result['department'],
-            priority=result['priority'],
-            image_description=result['image_description'],
-            description_match=result['description_match'],
-            confidence_score=result.get('confidence_score', 0.5),
-            suggested_actions=result.get('suggested_actions', [])
-        )
+        return ComplaintResponse.model_validate(result)
         
+    except HTTPException:
+        raise
+    except GeminiUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        logger.error(f"Error analyzing text: {e}")
+        logger.error("Error analyzing text: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
-    status = {
-        "status": "healthy",
-        "service": "Urban Infrastructure Analyzer",
-        "gemini_available": gemini_client is not None,
-        "api_version": "v2.0.0",
-        "supported_models": ["gemini-2.0-flash"]
-    }
-    return status
+    # Let monitors revalidate on every probe instead of serving a stale status
+    return _static_response(request, _HEALTH_ENTITY, cache_control="no-cache")
 
 @app.get("/tags")
-async def get_available_tags():
+async def get_available_tags(request: Request):
     """Get available tags organized by department"""
-    return {
-        "water_department": [tag.value for tag in Tag if tag.value in [
-            "Pipe Burst", "Low Pressure", "Quality Issue", "Meter Problem", "Billing Issue"
-        ]],
-        "roads_department": [tag.value for tag in Tag if tag.value in [
-            "Pothole", "Traffic Signal", "Street Light", "Road Damage", "Drainage"
-        ]],
-        "waste_management": [tag.value for tag in Tag if tag.value in [
-            "Collection Delay", "Bin Overflow", "Illegal Dumping", "Recycling", "Hazardous Waste"
-        ]],
-        "electricity_department": [tag.value for tag in Tag if tag.value in [
-            "Power Outage", "Voltage Issues", "Meter Reading", "Billing", "Street Light Electricity"
-        ]]
-    }
+    return _static_response(request, _TAGS_ENTITY)
 
 @app.get("/departments")
-async def get_available_departments():
+async def get_available_departments(request: Request):
     """Get available departments with contact information"""
-    return {dept.value: info.dict() for dept, info in DEPARTMENT_INFO.items()}
+    return _static_response(request, _DEPARTMENTS_ENTITY)
 
 @app.get("/priorities")
-async def get_available_priorities():
+async def get_available_priorities(request: Request):
     """Get available priorities"""
-    return {"priorities": [priority.value for priority in Priority]}
+    return _static_response(request, _PRIORITIES_ENTITY)
 
 @app.get("/department/{department_name}/info")
 async def get_department_info(department_name: Department):
@@ -193,37 +329,14 @@ async def get_department_info(department_name: Department):
     raise HTTPException(status_code=404, detail="Department not found")
 
 @app.get("/tags/{department_name}")
-async def get_tags_by_department(department_name: Department):
+async def get_tags_by_department(department_name: Department, request: Request):
     """Get tags for a specific department"""
-    department_tags = {
-        Department.WATER: [Tag.PIPE_BURST, Tag.LOW_PRESSURE, Tag.QUALITY_ISSUE, Tag.METER_PROBLEM, Tag.BILLING_ISSUE],
-        Department.ROADS: [Tag.POTHOLE, Tag.TRAFFIC_SIGNAL, Tag.STREET_LIGHT, Tag.ROAD_DAMAGE, Tag.DRAINAGE],
-        Department.WASTE: [Tag.COLLECTION_DELAY, Tag.BIN_OVERFLOW, Tag.ILLEGAL_DUMPING, Tag.RECYCLING, Tag.HAZARDOUS_WASTE],
-        Department.ELECTRICITY: [Tag.POWER_OUTAGE, Tag.VOLTAGE_ISSUES, Tag.METER_READING, Tag.BILLING, Tag.STREET_LIGHT_ELECTRICITY]
-    }
-    
-    if department_name in department_tags:
-        return {"department": department_name.value, "tags": [tag.value for tag in department_tags[department_name]]}
-    
-    return {"department": department_name.value, "tags": []}
+    return _static_response(request, _TAGS_PER_DEPT_ENTITIES[department_name])
 
 @app.get("/")
-async def root():
+async def root(request: Request):
     """Root endpoint with API information"""
-    return {
-        "message": "Urban Infrastructure Complaint Analyzer API",
-        "version": "2.0.0",
-        "docs": "/docs",
-        "endpoints": {
-            "analyze_complaint": "/analyze-complaint",
-            "analyze_text": "/analyze-text",
-            "health": "/health",
-            "tags": "/tags",
-            "departments": "/departments",
-            "priorities": "/priorities"
-        },
-        "status": "operational" if gemini_client else "initializing"
-    }
+    return _static_response(request, _ROOT_ENTITY)
 
 if __name__ == "__main__":
     import uvicorn
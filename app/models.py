@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, computed_field
 from typing import List, Optional
 from enum import Enum
 
@@ -59,8 +59,26 @@ class ComplaintResponse(BaseModel):
     description_match: bool
     confidence_score: float
     suggested_actions: List[str]
+    
+    # Presentation-ready values so clients don't need to reformat them
+    @computed_field
+    @property
+    def department_display(self) -> str:
+        return self.department.value.upper()
+    
+    @computed_field
+    @property
+    def priority_display(self) -> str:
+        return self.priority.value.upper()
+    
+    @computed_field
+    @property
+    def confidence_pct(self) -> str:
+        return f"{self.confidence_score * 100:.1f}%"
 
 class DepartmentInfo(BaseModel):
+    model_config = ConfigDict(frozen=True)
+    
     name: str
     contact_email: str
     contact_phone: str
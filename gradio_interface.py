@@ -1,119 +1,216 @@
 import gradio as gr
-import requests
-import base64
+import httpx
+import asyncio
+import atexit
+import hashlib
+import logging
 import os
-from PIL import Image
-import io
-import json
+import threading
+import time
+import orjson
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
 
 # API configuration
 API_URL = "http://localhost:8000"
 
-def analyze_complaint(image, description):
+# Shared async client so the Gradio event loop stays free while the backend works,
+# and connections to the API server are kept alive and reused
+ASYNC_CLIENT = httpx.AsyncClient(
+    base_url=API_URL,
+    timeout=httpx.Timeout(30.0, connect=3.0),
+    limits=httpx.Limits(max_keepalive_connections=32),
+    transport=httpx.AsyncHTTPTransport(retries=2)
+)
+
+# Sample descriptions for quick testing
+SAMPLE_DESCRIPTIONS = (
+    "Large pothole on the road causing traffic issues",
+    "Water pipe burst flooding the street",
+    "Garbage bin overflowing with trash",
+    "Street light not working at night",
+    "Power outage in the neighborhood",
+    "Sewage water leaking onto the road",
+    "Traffic signal malfunctioning",
+    "Illegal dumping of construction waste"
+)
+
+# Markdown layout of an analysis result
+_RESULT_TEMPLATE = (
+    "🏷️ **TAGS**: {tags}\n\n"
+    "🏢 **DEPARTMENT**: {dept}\n\n"
+    "⚡ **PRIORITY**: {pri}\n\n"
+    "📝 **DESCRIPTION MATCH**: {match}\n\n"
+    "🎯 **CONFIDENCE**: {conf}\n\n"
+    "📋 **IMAGE DESCRIPTION**:\n{img}\n\n"
+    "🚀 **SUGGESTED ACTIONS**:\n{actions}"
+)
+
+# Longest image side uploaded to the API
+MAX_UPLOAD_SIDE = 1280
+
+# Recently encoded uploads, so re-submitting the same image skips the JPEG encode
+_ENCODE_CACHE = OrderedDict()
+_ENCODE_CACHE_SIZE = 4
+# Side of the thumbnail hashed for the cache key
+_ENCODE_KEY_SIDE = 64
+# _encode_image runs in worker threads, so cache reads and evictions must not interleave
+_ENCODE_CACHE_LOCK = threading.Lock()
+
+# Recent analysis results keyed on (JPEG digest, normalized description)
+_RESULT_CACHE = OrderedDict()
+_RESULT_CACHE_SIZE = 32
+
+# Last health check result, shared by page loads and refreshes within the TTL
+_HEALTH_CACHE = {"ts": 0.0, "val": None}
+_HEALTH_TTL = 1.0
+
+@atexit.register
+def _close_async_client():
+    # Gradio's event loop is gone at exit, so close the pool on a fresh one, best-effort
+    try:
+        asyncio.run(ASYNC_CLIENT.aclose())
+    except RuntimeError:
+        pass
+
+def _encode_image(image):
     """
-    Send image and description to the FastAPI endpoint for analysis
+    Encode a PIL image as JPEG bytes, reusing the result for recently seen pixels
+    """
+    # Only needed once an image is submitted, so keep them out of interface start-up
+    import io
+    from PIL import Image, ImageOps
+    
+    # Gradio hands over a new Image object per click, so key on the pixel data rather than id().
+    # A small box-filtered thumbnail stands in for the full frame, which would be a
+    # multi-megabyte copy on every click; only differences finer than it can collide
+    thumbnail = image.resize((_ENCODE_KEY_SIDE, _ENCODE_KEY_SIDE), Image.Resampling.BOX)
+    key = (hashlib.blake2b(thumbnail.tobytes(), digest_size=16).digest(), image.size, image.mode)
+    with _ENCODE_CACHE_LOCK:
+        if key in _ENCODE_CACHE:
+            _ENCODE_CACHE.move_to_end(key)
+            return _ENCODE_CACHE[key]
+    
+    # Downscale large uploads straight into a new, smaller image (no full-size copy);
+    # small images are encoded as-is
+    if max(image.size) > MAX_UPLOAD_SIDE:
+        image = ImageOps.contain(image, (MAX_UPLOAD_SIDE, MAX_UPLOAD_SIDE), Image.Resampling.LANCZOS)
+    
+    # Convert PIL Image to bytes
+    buffered = io.BytesIO()
+    image.save(buffered, format="JPEG", quality=80, optimize=False)
+    # getvalue() copies the encoded JPEG once; it is small after the downscale, and the
+    # caches and the upload need immutable bytes rather than a view of the buffer
+    img_bytes = buffered.getvalue()
+    
+    with _ENCODE_CACHE_LOCK:
+        _ENCODE_CACHE[key] = img_bytes
+        if len(_ENCODE_CACHE) > _ENCODE_CACHE_SIZE:
+            _ENCODE_CACHE.popitem(last=False)
+    return img_bytes
+
+async def analyze_complaint(image, description, force_refresh=False):
+    """
+    Send image and description to the FastAPI endpoint for analysis.
+    Repeated submissions are answered from _RESULT_CACHE unless force_refresh is set.
     """
     try:
-        # Convert image to base64
         if image is None:
-            return "Please upload an image", "", "", "", "", ""
-        
-        # Convert PIL Image to bytes
-        buffered = io.BytesIO()
-        image.save(buffered, format="JPEG")
-        img_bytes = buffered.getvalue()
+            return "Please upload an image"
         
-        # Encode to base64
-        img_base64 = base64.b64encode(img_bytes).decode('utf-8')
-        img_data_uri = f"data:image/jpeg;base64,{img_base64}"
+        # Convert PIL Image to JPEG bytes; encoding is CPU-bound, keep it off the event loop
+        img_bytes = await asyncio.to_thread(_encode_image, image)
         
-        # Prepare payload
-        payload = {
-            "description": description,
-            "image_data": img_data_uri
-        }
+        key = (hashlib.blake2b(img_bytes, digest_size=16).digest(), description.strip().lower())
+        result = None if force_refresh else _RESULT_CACHE.get(key)
         
-        # Send request to FastAPI
-        response = requests.post(f"{API_URL}/analyze-complaint", json=payload)
-        
-        if response.status_code == 200:
-            result = response.json()
-            
-            # Format the response
-            tags = ", ".join(result['tags'])
-            department = result['department'].upper()
-            priority = result['priority'].upper()
-            description_match = "✅ MATCHES" if result['description_match'] else "❌ DOES NOT MATCH"
-            confidence = f"{result['confidence_score'] * 100:.1f}%"
-            image_desc = result['image_description']
-            suggested_actions = "\n".join([f"• {action}" for action in result['suggested_actions']])
-            
-            # Create formatted output
-            output = f"""
-            🏷️ **TAGS**: {tags}
-            
-            🏢 **DEPARTMENT**: {department}
-            
-            ⚡ **PRIORITY**: {priority}
-            
-            📝 **DESCRIPTION MATCH**: {description_match}
-            
-            🎯 **CONFIDENCE**: {confidence}
-            
-            📋 **IMAGE DESCRIPTION**:
-            {image_desc}
+        if result is not None:
+            _RESULT_CACHE.move_to_end(key)
+        else:
+            # Send the raw JPEG as multipart form data, no base64 inflation
+            files = {"image": ("img.jpg", img_bytes, "image/jpeg")}
+            data = {"description": description}
             
-            🚀 **SUGGESTED ACTIONS**:
-            {suggested_actions}
-            """
+            # Send request to FastAPI
+            response = await ASYNC_CLIENT.post("/analyze-complaint/upload", files=files, data=data)
             
-            return output, tags, department, priority, description_match, confidence
+            if response.status_code != 200:
+                # Only show the start of textual error bodies; the banner doesn't need the full dump
+                content_type = response.headers.get("content-type", "")
+                if content_type.startswith(("text/", "application/json")):
+                    body = response.content[:512].decode("utf-8", "replace")
+                else:
+                    body = f"<{len(response.content)} bytes of {content_type or 'unknown content'}>"
+                error_msg = f"Error: {response.status_code} - {body}"
+                return error_msg
             
-        else:
-            error_msg = f"Error: {response.status_code} - {response.text}"
-            return error_msg, "", "", "", "", ""
+            result = orjson.loads(response.content)
+            _RESULT_CACHE[key] = result
+            if len(_RESULT_CACHE) > _RESULT_CACHE_SIZE:
+                _RESULT_CACHE.popitem(last=False)
+        
+        # Format the response
+        tags = ", ".join(result['tags'])
+        department = result['department_display']
+        priority = result['priority_display']
+        description_match = "✅ MATCHES" if result['description_match'] else "❌ DOES NOT MATCH"
+        confidence = result['confidence_pct']
+        image_desc = result['image_description']
+        suggested_actions = "• " + "\n• ".join(result['suggested_actions']) if result['suggested_actions'] else ""
+        
+        # Create formatted output
+        output = _RESULT_TEMPLATE.format_map({
+            "tags": tags,
+            "dept": department,
+            "pri": priority,
+            "match": description_match,
+            "conf": confidence,
+            "img": image_desc,
+            "actions": suggested_actions
+        })
+        
+        return output
             
     except Exception as e:
         error_msg = f"Connection error: {str(e)}. Make sure the FastAPI server is running on {API_URL}"
-        return error_msg, "", "", "", "", ""
+        return error_msg
 
-def test_connection():
+async def test_connection(use_cache=True):
     """
-    Test connection to the FastAPI server
+    Test connection to the FastAPI server.
+    Results are reused for _HEALTH_TTL seconds unless use_cache is False.
     """
+    if use_cache and _HEALTH_CACHE["val"] is not None and time.monotonic() - _HEALTH_CACHE["ts"] < _HEALTH_TTL:
+        return _HEALTH_CACHE["val"]
+    
     try:
-        response = requests.get(f"{API_URL}/health", timeout=5)
+        response = await ASYNC_CLIENT.get("/health", timeout=2, follow_redirects=False)
         if response.status_code == 200:
-            return "✅ Connected successfully to FastAPI server!"
+            status = "✅ Connected successfully to FastAPI server!"
         else:
-            return f"❌ Connection failed: {response.status_code}"
+            status = f"❌ Connection failed: {response.status_code}"
     except Exception as e:
-        return f"❌ Cannot connect to FastAPI server: {str(e)}"
+        status = f"❌ Cannot connect to FastAPI server: {str(e)}"
+    
+    _HEALTH_CACHE["ts"] = time.monotonic()
+    _HEALTH_CACHE["val"] = status
+    return status
 
 def get_sample_descriptions():
     """
     Return sample descriptions for quick testing
     """
-    samples = [
-        "Large pothole on the road causing traffic issues",
-        "Water pipe burst flooding the street",
-        "Garbage bin overflowing with trash",
-        "Street light not working at night",
-        "Power outage in the neighborhood",
-        "Sewage water leaking onto the road",
-        "Traffic signal malfunctioning",
-        "Illegal dumping of construction waste"
-    ]
-    return samples
+    return SAMPLE_DESCRIPTIONS
 
 # Create Gradio interface
-with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft") as demo:
+with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft", analytics_enabled=False) as demo:
     gr.Markdown("# 🏙️ Urban Infrastructure Complaint Analyzer")
     gr.Markdown("Upload an image and describe the infrastructure issue. The AI will analyze it and route to the appropriate department.")
     
     # Connection status
     with gr.Row():
-        status = gr.Textbox(label="Connection Status", value=test_connection(), interactive=False)
+        status = gr.Textbox(label="Connection Status", value="Checking connection...", interactive=False)
         refresh_btn = gr.Button("🔄 Refresh Connection")
     
     with gr.Row():
@@ -136,10 +233,13 @@ with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft") as demo:
             # Sample descriptions dropdown
             sample_dropdown = gr.Dropdown(
                 label="Quick Examples",
-                choices=get_sample_descriptions(),
-                value="Large pothole on the road causing traffic issues"
+                choices=SAMPLE_DESCRIPTIONS,
+                value=SAMPLE_DESCRIPTIONS[0]
             )
             
+            # Skip the cached result for a repeated submission
+            force_refresh_input = gr.Checkbox(label="Force re-analysis", value=False)
+            
             # Analyze button
             analyze_btn = gr.Button("🔍 Analyze Complaint", variant="primary")
         
@@ -149,16 +249,6 @@ with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft") as demo:
                 label="Analysis Results",
                 value="### Results will appear here after analysis..."
             )
-            
-            # Detailed outputs in an accordion
-            with gr.Accordion("📊 Detailed Results", open=False):
-                with gr.Row():
-                    tags_output = gr.Textbox(label="Tags", interactive=False)
-                    dept_output = gr.Textbox(label="Department", interactive=False)
-                with gr.Row():
-                    priority_output = gr.Textbox(label="Priority", interactive=False)
-                    match_output = gr.Textbox(label="Description Match", interactive=False)
-                confidence_output = gr.Textbox(label="Confidence Score", interactive=False)
     
     # Footer
     gr.Markdown("---")
@@ -168,8 +258,8 @@ with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft") as demo:
     def update_description(description):
         return description
     
-    def refresh_connection():
-        return test_connection()
+    async def refresh_connection():
+        return await test_connection(use_cache=False)
     
     # Connect events
     sample_dropdown.change(
@@ -183,22 +273,38 @@ with gr.Blocks(title="Urban Infrastructure Analyzer", theme="soft") as demo:
         outputs=[status]
     )
     
+    # test_connection is async now, so fill the status once the page has loaded
+    demo.load(
+        fn=test_connection,
+        outputs=[status]
+    )
+    
     analyze_btn.click(
         fn=analyze_complaint,
-        inputs=[image_input, description_input],
-        outputs=[output_text, tags_output, dept_output, priority_output, match_output, confidence_output]
+        inputs=[image_input, description_input, force_refresh_input],
+        outputs=[output_text],
+        concurrency_limit=4,
+        concurrency_id="analyze"
     )
 
+# Bound in-flight analyses so extra users wait in the queue instead of piling onto the backend
+demo.queue(max_size=64, default_concurrency_limit=4)
+
 # Instructions for running
 if __name__ == "__main__":
-    print("Starting Gradio interface...")
-    print("Make sure your FastAPI server is running on http://localhost:8000")
-    print("You can start it with: uvicorn app.main:app --reload --host 0.0.0.0 --port 8000")
-    print("\nThe Gradio interface will be available at http://localhost:7860")
+    logging.basicConfig(level=logging.INFO)
+    logger.info("Starting Gradio interface...")
+    logger.info("Make sure your FastAPI server is running on %s", API_URL)
+    logger.info("You can start it with: uvicorn app.main:app --reload --host 0.0.0.0 --port 8000")
+    logger.info("The Gradio interface will be available at http://localhost:7860")
     
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
         share=False,
-        show_error=True
+        show_error=True,
+        quiet=True,
+        show_api=False,
+        # Size the worker pool to the machine rather than Gradio's fixed default of 40
+        max_threads=min(16, (os.cpu_count() or 2) * 2)
     )
\ No newline at end of file
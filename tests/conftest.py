@@ -0,0 +1,4 @@
+import os
+
+# app.config refuses to load without a key; tests never reach the real API
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
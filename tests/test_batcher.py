@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.batcher import TextBatcher
+from app.gemini_api_client import GeminiUnavailableError
+
+
+class FakeClient:
+    """
+    Stands in for GeminiAPIClient; echoes each description back as its result
+    """
+    def __init__(self, delay: float = 0.0, error: Exception = None):
+        self.delay = delay
+        self.error = error
+        self.single_calls = []
+        self.batch_calls = []
+
+    async def analyze_text_only(self, description):
+        self.single_calls.append(description)
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return {"description": description}
+
+    async def analyze_text_batch(self, descriptions):
+        self.batch_calls.append(list(descriptions))
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return [{"description": description} for description in descriptions]
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_submit_without_start_calls_client_directly():
+    client = FakeClient()
+    batcher = TextBatcher(client)
+
+    assert run(batcher.submit("pothole")) == {"description": "pothole"}
+    assert client.single_calls == ["pothole"]
+
+
+def test_lone_description_is_not_batched():
+    async def scenario():
+        client = FakeClient()
+        batcher = TextBatcher(client)
+        batcher.start()
+        try:
+            return client, await batcher.submit("pothole")
+        finally:
+            await batcher.stop()
+
+    client, result = run(scenario())
+    assert result == {"description": "pothole"}
+    assert client.single_calls == ["pothole"]
+    assert client.batch_calls == []
+
+
+def test_burst_is_batched_and_fanned_out_in_order():
+    async def scenario():
+        client = FakeClient(delay=0.01)
+        batcher = TextBatcher(client, max_batch=4, max_wait=0.05)
+        batcher.start()
+        try:
+            descriptions = [f"complaint {i}" for i in range(6)]
+            results = await asyncio.gather(*(batcher.submit(d) for d in descriptions))
+            return client, descriptions, results
+        finally:
+            await batcher.stop()
+
+    client, descriptions, results = run(scenario())
+    assert results == [{"description": d} for d in descriptions]
+    assert all(len(batch) <= 4 for batch in client.batch_calls)
+    sent = client.single_calls + [d for batch in client.batch_calls for d in batch]
+    assert sorted(sent) == sorted(descriptions)
+    assert client.batch_calls
+
+
+def test_batch_error_reaches_every_caller():
+    async def scenario():
+        client = FakeClient(error=RuntimeError("boom"))
+        batcher = TextBatcher(client, max_batch=4, max_wait=0.05)
+        batcher.start()
+        try:
+            return await asyncio.gather(*(batcher.submit(str(i)) for i in range(4)), return_exceptions=True)
+        finally:
+            await batcher.stop()
+
+    results = run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stop_fails_queued_and_in_flight_callers():
+    async def scenario():
+        client = FakeClient(delay=10.0)
+        batcher = TextBatcher(client, max_batch=4, max_wait=1.0)
+        batcher.start()
+        tasks = [asyncio.create_task(batcher.submit(str(i))) for i in range(10)]
+        await asyncio.sleep(0.05)
+        await batcher.stop()
+        return await asyncio.wait_for(asyncio.gather(*tasks, return_exceptions=True), 1.0)
+
+    results = run(scenario())
+    assert len(results) == 10
+    assert all(isinstance(r, GeminiUnavailableError) for r in results)
+
+
+def test_stop_is_a_no_op_when_not_started():
+    run(TextBatcher(FakeClient()).stop())
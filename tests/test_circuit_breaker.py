@@ -0,0 +1,96 @@
+import pytest
+
+from app import circuit_breaker
+from app.circuit_breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(failure_threshold=3, recovery_timeout=10.0)
+
+
+def trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+
+
+def test_closed_until_threshold(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(breaker):
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_admits_a_single_probe(breaker, clock):
+    trip(breaker)
+    clock.now += 10.0
+    assert breaker.state == "half-open"
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes(breaker, clock):
+    trip(breaker)
+    clock.now += 10.0
+    assert breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_probe_failure_reopens(breaker, clock):
+    trip(breaker)
+    clock.now += 10.0
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow_request()
+
+    clock.now += 10.0
+    assert breaker.allow_request()
+
+
+def test_lost_probe_is_replaced_after_recovery_timeout(breaker, clock):
+    trip(breaker)
+    clock.now += 10.0
+    assert breaker.allow_request()
+
+    clock.now += 5.0
+    assert not breaker.allow_request()
+
+    clock.now += 5.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
@@ -0,0 +1,59 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import _etag_matches, app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_static_etag_is_weak(client):
+    response = client.get("/departments")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "public, max-age=3600"
+
+
+@pytest.mark.parametrize("header", [
+    'W/"abc"',
+    '"abc"',
+    '"other", W/"abc"',
+    ' "other" ,"abc" ',
+    "*",
+])
+def test_etag_matches(header):
+    assert _etag_matches(header, 'W/"abc"')
+
+
+@pytest.mark.parametrize("header", ['"abcd"', 'W/"ab"', '"other", "x"'])
+def test_etag_mismatch(header):
+    assert not _etag_matches(header, 'W/"abc"')
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get("/tags").headers["etag"]
+    response = client.get("/tags", headers={"If-None-Match": f'"stale", {etag[2:]}'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_empty_image_is_rejected(client):
+    response = client.post("/analyze-complaint", json={"description": "pothole", "image_data": "data:image/png;base64,"})
+    assert response.status_code == 400
+
+
+def test_malformed_base64_is_rejected(client):
+    response = client.post("/analyze-complaint", json={"description": "pothole", "image_data": "data:image/png;base64,@@@"})
+    assert response.status_code == 400
+
+
+def test_unreadable_upload_is_rejected_without_internals(client):
+    response = client.post(
+        "/analyze-complaint/upload",
+        data={"description": "pothole"},
+        files={"image": ("a.png", b"not an image", "image/png")}
+    )
+    assert response.status_code == 400
+    assert "BytesIO" not in response.text
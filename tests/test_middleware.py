@@ -0,0 +1,41 @@
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.middleware import LimitUploadSizeMiddleware
+
+MAX_BODY_SIZE = 100
+
+
+async def echo_length(request: Request):
+    body = await request.body()
+    return JSONResponse({"length": len(body)})
+
+
+def make_client():
+    app = Starlette(routes=[Route("/", echo_length, methods=["POST"])])
+    app.add_middleware(LimitUploadSizeMiddleware, max_body_size=MAX_BODY_SIZE)
+    return TestClient(app)
+
+
+def test_body_within_limit_passes():
+    response = make_client().post("/", content=b"x" * MAX_BODY_SIZE)
+    assert response.status_code == 200
+    assert response.json() == {"length": MAX_BODY_SIZE}
+
+
+def test_declared_length_over_limit_is_rejected():
+    response = make_client().post("/", content=b"x" * (MAX_BODY_SIZE + 1))
+    assert response.status_code == 413
+
+
+def test_streamed_body_over_limit_is_rejected():
+    def chunks():
+        for _ in range(5):
+            yield b"x" * 40
+
+    # A generator body is sent chunked, without a Content-Length to check up front
+    response = make_client().post("/", content=chunks())
+    assert response.status_code == 413